@@ -4,160 +4,406 @@ This adds intelligent summarization and impact analysis without paid APIs
 """
 
 import os
+import re
+import functools
+import itertools
 import warnings
+from datetime import datetime
 warnings.filterwarnings('ignore')
 
+from keyword_matcher import KeywordMatcher
+
+# Half the cores for inference leaves room for the scraper's worker threads
+# (keep MAX_SCRAPE_WORKERS small when models run in the same process)
+INFERENCE_THREADS = int(os.environ.get("AI_TRACKER_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+
+# BLAS/OpenMP pools size themselves at import time, so these must be set before torch loads
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, str(INFERENCE_THREADS))
+
 try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-    from transformers import T5ForConditionalGeneration, T5Tokenizer
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
     import torch
+    torch.set_num_threads(INFERENCE_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already fixed once any inter-op work has started in this process
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
     print("⚠️  Transformers not available. Install with: pip install transformers torch")
 
+try:
+    # Optional: INT8-quantized ONNX Runtime summarizer (pip install optimum[onnxruntime])
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-6-6"
+SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+
+# Identifies the models behind a cached analysis; part of every ai_cache key
+SUMMARIZER_BACKEND = "onnx-int8" if ONNX_AVAILABLE else "torch"
+AI_CACHE_NAMESPACE = f"{SUMMARIZER_MODEL}|{SUMMARIZER_BACKEND}|{SENTIMENT_MODEL}"
+
+# Set AI_TRACKER_COMPILE=0 to skip the torch.compile warm-up on startup
+COMPILE_SUMMARIZER = os.environ.get("AI_TRACKER_COMPILE", "1") != "0"
+COMPILE_WARMUP_TEXTS = (
+    "FDA issues updated guidance on labeling requirements for prescription drugs. " * 4,
+    "EMA publishes a revised reflection paper on the use of real-world evidence in marketing "
+    "authorisation applications, with new expectations for data quality and study design. " * 3
+)
+
+ONNX_MODEL_DIR = "onnx_models"
+ONNX_SEQ2SEQ_FILES = ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx")
+
+# Precompiled text-cleaning patterns
+_WS_RE = re.compile(r'\s+')
+_PUNCT_RE = re.compile(r'[^\w\s\.\,\;\:\!\?]')
+_SENTENCE_RE = re.compile(r'[^.]+')
+
+# Impact categories with keywords
+IMPACT_CATEGORIES = {
+    'Clinical Trials': (
+        'clinical trial', 'study protocol', 'patient enrollment',
+        'biomarker', 'endpoint', 'statistical analysis'
+    ),
+    'Manufacturing': (
+        'quality control', 'manufacturing', 'facility inspection',
+        'GMP', 'batch records', 'sterile production'
+    ),
+    'Labeling': (
+        'labeling', 'package insert', 'prescribing information',
+        'contraindication', 'warning', 'dosage'
+    ),
+    'Pharmacovigilance': (
+        'adverse event', 'safety monitoring', 'REMS',
+        'post-marketing', 'surveillance', 'risk evaluation'
+    ),
+    'Marketing': (
+        'promotional', 'advertising', 'marketing materials',
+        'commercial', 'launch', 'sales'
+    ),
+    'Regulatory Affairs': (
+        'submission', 'filing', 'regulatory pathway',
+        'approval', 'guidance', 'compliance'
+    )
+}
+
+# Custom urgency keywords
+URGENCY_KEYWORDS = {
+    'urgent': (
+        'immediate', 'urgent', 'critical', 'emergency',
+        'recall', 'warning', 'death', 'serious adverse'
+    ),
+    'high_priority': (
+        'safety', 'black box', 'contraindication',
+        'withdrawal', 'suspension', 'investigation'
+    )
+}
+
+# Keyword sets for the rule-based fallbacks
+FALLBACK_IMPACT_AREAS = {
+    'Clinical Trials': ('clinical', 'trial', 'study', 'protocol'),
+    'Labeling': ('label', 'labeling', 'package insert', 'prescribing'),
+    'Manufacturing': ('manufacturing', 'quality', 'facility', 'inspection'),
+    'Pharmacovigilance': ('safety', 'adverse', 'reaction', 'monitoring'),
+    'Marketing': ('promotion', 'advertising', 'marketing', 'commercial'),
+    'Regulatory Affairs': ('submission', 'filing', 'application', 'review')
+}
+
+FALLBACK_RISK_KEYWORDS = {
+    'high': (
+        'recall', 'warning', 'safety', 'death', 'serious', 'urgent',
+        'immediate', 'black box', 'contraindication', 'withdrawal'
+    ),
+    'medium': (
+        'labeling', 'indication', 'dosage', 'administration', 'clinical',
+        'trial', 'study', 'efficacy', 'approval', 'guidance'
+    )
+}
+
+# Action item templates for generate_action_items
+HIGH_RISK_ACTIONS = (
+    "🚨 IMMEDIATE: Convene emergency compliance review within 24 hours",
+    "📞 URGENT: Notify all stakeholders and halt affected processes if necessary"
+)
+
+AREA_ACTIONS = {
+    'Labeling': (
+        "📋 Review and update all product labeling materials",
+        "🔍 Audit current package inserts for compliance gaps"
+    ),
+    'Clinical Trials': (
+        "🧪 Assess impact on ongoing clinical studies",
+        "📊 Update study protocols if required"
+    ),
+    'Manufacturing': (
+        "🏭 Inspect manufacturing processes for compliance",
+        "📝 Update quality control procedures"
+    ),
+    'Pharmacovigilance': (
+        "🔒 Review safety monitoring procedures",
+        "📈 Update risk evaluation protocols"
+    ),
+    'Marketing': (
+        "📢 Review all promotional materials for compliance",
+        "🎯 Update marketing approval processes"
+    )
+}
+
+GENERAL_ACTIONS = (
+    "📄 Document compliance assessment in regulatory files",
+    "⏰ Set timeline for implementation based on regulatory deadlines"
+)
+
+# Keyword automata are built once at import; each scan is a single pass over the text
+IMPACT_MATCHER = KeywordMatcher(IMPACT_CATEGORIES)
+URGENCY_MATCHER = KeywordMatcher(URGENCY_KEYWORDS)
+FALLBACK_IMPACT_MATCHER = KeywordMatcher(FALLBACK_IMPACT_AREAS)
+FALLBACK_RISK_MATCHER = KeywordMatcher(FALLBACK_RISK_KEYWORDS)
+
+@functools.lru_cache(maxsize=None)
+def _get_pipeline(task: str, model_name: str):
+    """Load a Hugging Face pipeline once per process so every AIEnhancer shares it"""
+    print(f"🤖 Loading AI model {model_name}...")
+    return pipeline(
+        task,
+        model=model_name,
+        device=-1,  # CPU only for free version
+        # Load weights in their stored dtype without a full FP32 staging copy
+        model_kwargs={"torch_dtype": "auto", "low_cpu_mem_usage": True}
+    )
+
+@functools.lru_cache(maxsize=None)
+def _get_summarizer(model_name: str):
+    """Load the PyTorch summarizer's tokenizer and model once per process"""
+    print(f"🤖 Loading AI model {model_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        model_name,
+        # Load weights in their stored dtype without a full FP32 staging copy
+        torch_dtype="auto",
+        low_cpu_mem_usage=True
+    ).eval()  # CPU only for free version
+    
+    if COMPILE_SUMMARIZER and hasattr(torch, "compile"):
+        _compile_summarizer(tokenizer, model)
+    
+    return tokenizer, model
+
+def _compile_summarizer(tokenizer, model):
+    """Compile the summarizer's forward pass and warm it up so real batches don't recompile"""
+    original_forward = model.forward
+    
+    try:
+        # Compile forward rather than the module: generate() calls the module's own forward,
+        # which would bypass a compiled wrapper. dynamic=True traces with symbolic shapes.
+        model.forward = torch.compile(original_forward, mode="reduce-overhead", dynamic=True)
+        
+        # Dynamo specializes size-1 dims and generalizes a dim only after it has changed once,
+        # so warm up with a single text and two batch sizes of mixed lengths; otherwise the first
+        # real batch of each kind recompiles
+        print("🔧 Compiling summarizer (one-time warm-up)...")
+        for batch_size in (1, 2, 3):
+            _generate_summaries(tokenizer, model, list(COMPILE_WARMUP_TEXTS * 2)[:batch_size])
+    except Exception as e:
+        model.forward = original_forward
+        print(f"⚠️  torch.compile unavailable, running summarizer in eager mode: {e}")
+
+def _generate_summaries(tokenizer, model, texts: list) -> list:
+    """Tokenize a batch, run greedy generation and decode the summaries"""
+    inputs = tokenizer(texts, padding=True, truncation=True, max_length=1024, return_tensors="pt")
+    # Greedy decoding: the checkpoint's default 4-beam search costs ~4x the compute
+    output = model.generate(**inputs, max_length=100, min_length=25, num_beams=1, do_sample=False)
+    return tokenizer.batch_decode(output, skip_special_tokens=True)
+
+@functools.lru_cache(maxsize=None)
+def _get_onnx_summarizer(model_name: str):
+    """Export a seq2seq model to ONNX, INT8-quantize it once on disk, and load the sessions"""
+    save_dir = os.path.join(ONNX_MODEL_DIR, model_name.replace('/', '--'))
+    quantized_files = [name.replace('.onnx', '_quantized.onnx') for name in ONNX_SEQ2SEQ_FILES]
+    
+    if not all(os.path.exists(os.path.join(save_dir, name)) for name in quantized_files):
+        print(f"🤖 Exporting {model_name} to quantized ONNX (one-time)...")
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(save_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(save_dir)
+        
+        # Dynamic quantization needs no calibration data
+        quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        for file_name in ONNX_SEQ2SEQ_FILES:
+            quantizer = ORTQuantizer.from_pretrained(save_dir, file_name=file_name)
+            quantizer.quantize(save_dir=save_dir, quantization_config=quantization_config)
+    
+    session_options = onnxruntime.SessionOptions()
+    # Same thread budget as the PyTorch backend
+    session_options.intra_op_num_threads = INFERENCE_THREADS
+    session_options.inter_op_num_threads = 1
+    
+    print(f"🤖 Loading ONNX model {model_name}...")
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        save_dir,
+        encoder_file_name=quantized_files[0],
+        decoder_file_name=quantized_files[1],
+        decoder_with_past_file_name=quantized_files[2],
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+    return AutoTokenizer.from_pretrained(save_dir), model
+
 class AIEnhancer:
-    def __init__(self):
-        self.summarizer = None
-        self.classifier = None
-        self.sentiment_analyzer = None
+    def _load_pipeline(self, task: str, model_name: str):
+        """Fetch a shared pipeline, or None when models can't be loaded"""
+        if not TRANSFORMERS_AVAILABLE:
+            return None
         
-        if TRANSFORMERS_AVAILABLE:
-            self._load_models()
+        try:
+            return _get_pipeline(task, model_name)
+        except Exception as e:
+            print(f"⚠️  Could not load AI model {model_name}: {e}")
+            print("💡 Using fallback rule-based analysis")
+            return None
     
-    def _load_models(self):
-        """Load free models from Hugging Face"""
+    @functools.cached_property
+    def summarizer(self):
+        """(tokenizer, model) for the summarization model (lightweight), loaded on first use"""
+        if not TRANSFORMERS_AVAILABLE:
+            return None
+        
         try:
-            print("🤖 Loading AI models...")
-            
-            # Summarization model (lightweight)
-            self.summarizer = pipeline(
-                "summarization",
-                model="sshleifer/distilbart-cnn-6-6",
-                max_length=150,
-                min_length=30,
-                device=-1  # CPU only for free version
-            )
-            
-            # Text classification for impact analysis
-            self.classifier = pipeline(
-                "text-classification",
-                model="microsoft/DialoGPT-medium",  # Alternative: "distilbert-base-uncased"
-                device=-1
-            )
-            
-            # Sentiment/urgency analysis
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                device=-1
-            )
-            
-            print("✅ AI models loaded successfully!")
-            
+            return _get_summarizer(SUMMARIZER_MODEL)
         except Exception as e:
-            print(f"⚠️  Could not load AI models: {e}")
+            print(f"⚠️  Could not load AI model {SUMMARIZER_MODEL}: {e}")
             print("💡 Using fallback rule-based analysis")
+            return None
+    
+    @functools.cached_property
+    def onnx_summarizer(self):
+        """(tokenizer, model) for the quantized ONNX summarizer, preferred when installed"""
+        if not (TRANSFORMERS_AVAILABLE and ONNX_AVAILABLE):
+            return None
+        
+        try:
+            return _get_onnx_summarizer(SUMMARIZER_MODEL)
+        except Exception as e:
+            print(f"⚠️  Could not load ONNX summarizer: {e}")
+            print("💡 Falling back to the PyTorch summarizer")
+            return None
+    
+    @functools.cached_property
+    def sentiment_analyzer(self):
+        """Sentiment/urgency analysis, loaded on first use"""
+        return self._load_pipeline("sentiment-analysis", SENTIMENT_MODEL)
     
     def generate_smart_summary(self, content: str) -> str:
         """Generate intelligent summary using AI"""
-        if not self.summarizer or len(content) < 100:
-            return self._fallback_summary(content)
+        return self.generate_smart_summaries([content])[0]
+    
+    def generate_smart_summaries(self, contents: list, batch_size: int = 8) -> list:
+        """Generate intelligent summaries for many documents with batched model calls"""
+        return self._generate_smart_summaries(contents, batch_size)[0]
+    
+    def _generate_smart_summaries(self, contents: list, batch_size: int = 8) -> tuple:
+        """(summaries, indexes that got a rule-based stand-in because the model was unavailable or failed)"""
+        if all(len(content) < 100 for content in contents):
+            return [self._fallback_summary(content) for content in contents], set()
         
-        try:
+        if not (self.onnx_summarizer or self.summarizer):
+            return [self._fallback_summary(content) for content in contents], set(range(len(contents)))
+        
+        summaries = []
+        pending = []  # indexes whose cleaned text still needs the model
+        for i, content in enumerate(contents):
+            if len(content) < 100:
+                summaries.append(self._fallback_summary(content))
+                continue
+            
             # Clean and prepare text
             clean_content = self._clean_text(content)
-            if len(clean_content) < 100:
-                return clean_content
-            
-            # Use AI summarizer
-            summary = self.summarizer(
-                clean_content[:1024],  # Limit input length
-                max_length=100,
-                min_length=25,
-                do_sample=False
-            )
-            
-            return summary[0]['summary_text']
-            
+            summaries.append(clean_content)
+            if len(clean_content) >= 100:
+                pending.append(i)
+        
+        if not pending:
+            return summaries, set()
+        
+        # The PyTorch model standing in for a preferred ONNX one that failed to load is a fallback too
+        degraded = set(pending) if ONNX_AVAILABLE and not self.onnx_summarizer else set()
+        
+        try:
+            texts = [summaries[i][:1024] for i in pending]  # Limit input length
+            results = self._summarize_batch(texts, batch_size)
         except Exception as e:
             print(f"AI summarization failed: {e}")
-            return self._fallback_summary(content)
+            results = [self._fallback_summary(contents[i]) for i in pending]
+            degraded = set(pending)
+        
+        for i, summary in zip(pending, results):
+            summaries[i] = summary
+        
+        return summaries, degraded
+    
+    def _summarize_batch(self, texts: list, batch_size: int) -> list:
+        """Run the summarization model over already-cleaned texts"""
+        # Both backends expose generate(), called directly without pipeline overhead
+        tokenizer, model = self.onnx_summarizer or self.summarizer
+        
+        summaries = []
+        for start in range(0, len(texts), batch_size):
+            summaries.extend(_generate_summaries(tokenizer, model, texts[start:start + batch_size]))
+        
+        return summaries
     
     def analyze_impact_areas(self, content: str) -> list:
         """AI-powered impact area detection"""
+        return self._analyze_impact_areas_lower(content.lower())
+    
+    def _analyze_impact_areas_lower(self, content_lower: str) -> list:
+        """Impact area detection on already-lowercased content"""
         if not TRANSFORMERS_AVAILABLE:
-            return self._rule_based_impact_analysis(content)
+            return self._rule_based_impact_analysis(content_lower)
         
         try:
-            # Define impact categories with keywords
-            impact_categories = {
-                'Clinical Trials': [
-                    'clinical trial', 'study protocol', 'patient enrollment',
-                    'biomarker', 'endpoint', 'statistical analysis'
-                ],
-                'Manufacturing': [
-                    'quality control', 'manufacturing', 'facility inspection',
-                    'GMP', 'batch records', 'sterile production'
-                ],
-                'Labeling': [
-                    'labeling', 'package insert', 'prescribing information',
-                    'contraindication', 'warning', 'dosage'
-                ],
-                'Pharmacovigilance': [
-                    'adverse event', 'safety monitoring', 'REMS',
-                    'post-marketing', 'surveillance', 'risk evaluation'
-                ],
-                'Marketing': [
-                    'promotional', 'advertising', 'marketing materials',
-                    'commercial', 'launch', 'sales'
-                ],
-                'Regulatory Affairs': [
-                    'submission', 'filing', 'regulatory pathway',
-                    'approval', 'guidance', 'compliance'
-                ]
-            }
-            
-            content_lower = content.lower()
-            detected_areas = []
-            
             # Score each category
-            for category, keywords in impact_categories.items():
-                score = sum(1 for keyword in keywords if keyword in content_lower)
-                if score >= 2:  # Threshold for relevance
-                    detected_areas.append(category)
+            scores = IMPACT_MATCHER.count(content_lower)
+            detected_areas = [
+                category for category, score in scores.items()
+                if score >= 2  # Threshold for relevance
+            ]
             
             return detected_areas if detected_areas else ['General Regulatory']
             
         except Exception as e:
-            return self._rule_based_impact_analysis(content)
+            return self._rule_based_impact_analysis(content_lower)
     
     def assess_urgency_level(self, title: str, content: str) -> dict:
         """AI-powered urgency assessment"""
-        text = f"{title} {content}"
+        return self._assess_urgency_level_lower(title, content, content.lower())
+    
+    def _assess_urgency_level_lower(self, title: str, content: str, content_lower: str) -> dict:
+        """Urgency assessment reusing an already-lowercased copy of content"""
+        title_lower = title.lower()
+        model_result = self._model_urgency(title, content, title_lower, content_lower)
         
+        # Fallback to rule-based
+        return model_result or self._rule_based_risk_assessment(f"{title_lower} {content_lower}")
+    
+    def _model_urgency(self, title: str, content: str, title_lower: str, content_lower: str):
+        """Sentiment-model urgency assessment, or None when the model is unavailable or fails"""
         try:
             if self.sentiment_analyzer:
                 # Analyze sentiment/urgency
-                result = self.sentiment_analyzer(text[:512])
+                result = self.sentiment_analyzer(f"{title} {content[:512]}"[:512])
                 sentiment_score = result[0]['score']
                 
-                # Custom urgency keywords
-                urgent_keywords = [
-                    'immediate', 'urgent', 'critical', 'emergency',
-                    'recall', 'warning', 'death', 'serious adverse'
-                ]
-                
-                high_priority_keywords = [
-                    'safety', 'black box', 'contraindication',
-                    'withdrawal', 'suspension', 'investigation'
-                ]
-                
-                text_lower = text.lower()
-                
                 # Calculate urgency score
-                urgent_score = sum(1 for keyword in urgent_keywords if keyword in text_lower)
-                priority_score = sum(1 for keyword in high_priority_keywords if keyword in text_lower)
+                scores = URGENCY_MATCHER.count(f"{title_lower} {content_lower}")
+                urgent_score = scores['urgent']
+                priority_score = scores['high_priority']
                 
                 if urgent_score > 0 or sentiment_score < 0.3:
                     risk_level = 'high'
@@ -175,61 +421,30 @@ class AIEnhancer:
         except Exception as e:
             pass
         
-        # Fallback to rule-based
-        return self._rule_based_risk_assessment(text)
+        return None
     
     def generate_action_items(self, change_data: dict) -> list:
         """Generate specific action items based on change analysis"""
-        actions = []
-        
         risk_level = change_data.get('risk_level', 'medium')
         impact_areas = change_data.get('impact_areas', [])
-        title = change_data.get('title', '')
         
-        # Risk-based actions
-        if risk_level == 'high':
-            actions.append("🚨 IMMEDIATE: Convene emergency compliance review within 24 hours")
-            actions.append("📞 URGENT: Notify all stakeholders and halt affected processes if necessary")
-        
-        # Area-specific actions
-        for area in impact_areas:
-            if area == 'Labeling':
-                actions.append("📋 Review and update all product labeling materials")
-                actions.append("🔍 Audit current package inserts for compliance gaps")
-            
-            elif area == 'Clinical Trials':
-                actions.append("🧪 Assess impact on ongoing clinical studies")
-                actions.append("📊 Update study protocols if required")
-            
-            elif area == 'Manufacturing':
-                actions.append("🏭 Inspect manufacturing processes for compliance")
-                actions.append("📝 Update quality control procedures")
-            
-            elif area == 'Pharmacovigilance':
-                actions.append("🔒 Review safety monitoring procedures")
-                actions.append("📈 Update risk evaluation protocols")
-            
-            elif area == 'Marketing':
-                actions.append("📢 Review all promotional materials for compliance")
-                actions.append("🎯 Update marketing approval processes")
-        
-        # General actions
-        actions.append("📄 Document compliance assessment in regulatory files")
-        actions.append("⏰ Set timeline for implementation based on regulatory deadlines")
+        # Risk-based, then area-specific, then general actions
+        actions = list(HIGH_RISK_ACTIONS) if risk_level == 'high' else []
+        actions.extend(action for area in impact_areas for action in AREA_ACTIONS.get(area, ()))
+        actions.extend(GENERAL_ACTIONS)
         
         return actions[:6]  # Limit to top 6 actions
     
     def _clean_text(self, text: str) -> str:
         """Clean text for processing"""
-        import re
         # Remove extra whitespace and special characters
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s\.\,\;\:\!\?]', '', text)
-        return text.strip()
+        return _PUNCT_RE.sub('', _WS_RE.sub(' ', text)).strip()
     
     def _fallback_summary(self, content: str) -> str:
         """Rule-based summary when AI is not available"""
-        sentences = [s.strip() for s in content.split('.') if len(s.strip()) > 10]
+        # Scan lazily; only the first three qualifying sentences are ever needed
+        candidates = (m.group(0).strip() for m in _SENTENCE_RE.finditer(content))
+        sentences = list(itertools.islice((s for s in candidates if len(s) > 10), 3))
         if len(sentences) <= 2:
             return content[:200] + "..." if len(content) > 200 else content
         
@@ -239,43 +454,20 @@ class AIEnhancer:
         
         return summary[:250] + "..." if len(summary) > 250 else summary
     
-    def _rule_based_impact_analysis(self, content: str) -> list:
-        """Fallback rule-based impact analysis"""
-        areas = {
-            'Clinical Trials': ['clinical', 'trial', 'study', 'protocol'],
-            'Labeling': ['label', 'labeling', 'package insert', 'prescribing'],
-            'Manufacturing': ['manufacturing', 'quality', 'facility', 'inspection'],
-            'Pharmacovigilance': ['safety', 'adverse', 'reaction', 'monitoring'],
-            'Marketing': ['promotion', 'advertising', 'marketing', 'commercial'],
-            'Regulatory Affairs': ['submission', 'filing', 'application', 'review']
-        }
-        
-        content_lower = content.lower()
-        impacted_areas = []
-        
-        for area, keywords in areas.items():
-            if any(keyword in content_lower for keyword in keywords):
-                impacted_areas.append(area)
+    def _rule_based_impact_analysis(self, content_lower: str) -> list:
+        """Fallback rule-based impact analysis on lowercased content"""
+        scores = FALLBACK_IMPACT_MATCHER.count(content_lower)
+        impacted_areas = [area for area, score in scores.items() if score > 0]
         
         return impacted_areas if impacted_areas else ['General']
     
-    def _rule_based_risk_assessment(self, text: str) -> dict:
-        """Fallback rule-based risk assessment"""
-        high_risk_keywords = [
-            'recall', 'warning', 'safety', 'death', 'serious', 'urgent',
-            'immediate', 'black box', 'contraindication', 'withdrawal'
-        ]
+    def _rule_based_risk_assessment(self, text_lower: str) -> dict:
+        """Fallback rule-based risk assessment on lowercased text"""
+        scores = FALLBACK_RISK_MATCHER.count(text_lower)
         
-        medium_risk_keywords = [
-            'labeling', 'indication', 'dosage', 'administration', 'clinical',
-            'trial', 'study', 'efficacy', 'approval', 'guidance'
-        ]
-        
-        text_lower = text.lower()
-        
-        if any(keyword in text_lower for keyword in high_risk_keywords):
+        if scores['high'] > 0:
             return {'risk_level': 'high', 'confidence': 0.8, 'reasoning': 'High-risk keywords detected'}
-        elif any(keyword in text_lower for keyword in medium_risk_keywords):
+        elif scores['medium'] > 0:
             return {'risk_level': 'medium', 'confidence': 0.7, 'reasoning': 'Medium-risk keywords detected'}
         else:
             return {'risk_level': 'low', 'confidence': 0.6, 'reasoning': 'No high-risk indicators found'}
@@ -291,15 +483,58 @@ class AIEnhancedTracker:
         """Process changes with AI enhancement"""
         enhanced_changes = []
         
-        for item in scraped_data:
-            # Generate AI summary
-            ai_summary = self.ai_enhancer.generate_smart_summary(item['content'])
+        # Title feeds the urgency scoring and the models shape every output, so both are in the key
+        content_hashes = [
+            self.tracker.calculate_content_hash(f"{AI_CACHE_NAMESPACE}\n{item['title']}\n{item['content']}")
+            for item in scraped_data
+        ]
+        cached = self.tracker.get_cached_ai_results(content_hashes)
+        
+        # Only text not analyzed in an earlier cycle goes through the models
+        misses = {}
+        for content_hash, item in zip(content_hashes, scraped_data):
+            if content_hash not in cached:
+                misses.setdefault(content_hash, item)
+        
+        if misses:
+            items = list(misses.values())
+            
+            # Summarize all misses up front so the model runs in batches
+            ai_summaries, degraded = self.ai_enhancer._generate_smart_summaries(
+                [item['content'] for item in items]
+            )
             
-            # Analyze impact areas
-            impact_areas = self.ai_enhancer.analyze_impact_areas(item['content'])
+            fresh = {}
+            cacheable = {}
+            for i, (content_hash, item, ai_summary) in enumerate(zip(misses, items, ai_summaries)):
+                # Lowercase once and share it between the keyword scans
+                content_lower = item['content'].lower()
+                title_lower = item['title'].lower()
+                
+                urgency_analysis = self.ai_enhancer._model_urgency(
+                    item['title'], item['content'], title_lower, content_lower
+                )
+                model_backed = urgency_analysis is not None and i not in degraded
+                if urgency_analysis is None:
+                    urgency_analysis = self.ai_enhancer._rule_based_risk_assessment(f"{title_lower} {content_lower}")
+                
+                fresh[content_hash] = {
+                    'ai_summary': ai_summary,
+                    'impact_areas': self.ai_enhancer._analyze_impact_areas_lower(content_lower),
+                    'risk_level': urgency_analysis['risk_level'],
+                    'confidence': urgency_analysis.get('confidence', 0.5),
+                    'reasoning': urgency_analysis.get('reasoning', '')
+                }
+                
+                # Rule-based stand-ins are recomputed next cycle so model output replaces them once available
+                if model_backed:
+                    cacheable[content_hash] = fresh[content_hash]
             
-            # Assess urgency
-            urgency_analysis = self.ai_enhancer.assess_urgency_level(item['title'], item['content'])
+            self.tracker.store_ai_results(cacheable)
+            cached.update(fresh)
+        
+        for content_hash, item in zip(content_hashes, scraped_data):
+            analysis = cached[content_hash]
             
             # Create enhanced change object
             enhanced_change = {
@@ -307,11 +542,11 @@ class AIEnhancedTracker:
                 'title': item['title'],
                 'url': item['url'],
                 'content': item['content'],
-                'ai_summary': ai_summary,
-                'impact_areas': impact_areas,
-                'risk_level': urgency_analysis['risk_level'],
-                'confidence': urgency_analysis.get('confidence', 0.5),
-                'reasoning': urgency_analysis.get('reasoning', ''),
+                'ai_summary': analysis['ai_summary'],
+                'impact_areas': list(analysis['impact_areas']),
+                'risk_level': analysis['risk_level'],
+                'confidence': analysis['confidence'],
+                'reasoning': analysis['reasoning'],
                 'detected_at': datetime.now().isoformat()
             }
             
@@ -0,0 +1,46 @@
+"""
+Multi-pattern keyword matching for the rule-based analysis paths
+Scans each document once with an Aho-Corasick automaton when pyahocorasick is installed
+"""
+
+from typing import Dict, Iterable
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+class KeywordMatcher:
+    """Count keyword hits for several named keyword groups in a single pass"""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups = {group: tuple(keywords) for group, keywords in groups.items()}
+        self._automaton = None
+
+        if AHOCORASICK_AVAILABLE:
+            # Payload carries the keyword itself plus every group it belongs to
+            keyword_groups = {}
+            for group, keywords in self.groups.items():
+                for keyword in keywords:
+                    keyword_groups.setdefault(keyword, []).append(group)
+
+            self._automaton = ahocorasick.Automaton()
+            for keyword, owners in keyword_groups.items():
+                self._automaton.add_word(keyword, (keyword, tuple(owners)))
+            self._automaton.make_automaton()
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords from each group found in text, in group order"""
+        if self._automaton is None:
+            return {
+                group: sum(1 for keyword in keywords if keyword in text)
+                for group, keywords in self.groups.items()
+            }
+
+        found = {group: set() for group in self.groups}
+        for _, (keyword, owners) in self._automaton.iter(text):
+            for group in owners:
+                found[group].add(keyword)
+
+        return {group: len(keywords) for group, keywords in found.items()}
@@ -4,13 +4,62 @@ import sqlite3
 import hashlib
 import json
 from datetime import datetime, timedelta
-import difflib
 import re
 from dataclasses import dataclass
 from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import time
 
-@dataclass
+from keyword_matcher import KeywordMatcher
+
+try:
+    # Optional: xxh3 fingerprints are several times faster than hashlib digests
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+SCRAPER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Keep small: each worker holds a connection, and AI models may share the process's CPUs
+MAX_SCRAPE_WORKERS = 4
+
+# Stay under SQLite's default limit of 999 bound parameters per statement
+SQLITE_MAX_PARAMS = 900
+
+# Containers that look like news/update listings on agency pages
+ARTICLE_CLASS_RE = re.compile(r'.*news.*|.*update.*|.*announcement.*')
+# First heading or link (in document order) inside a matched container
+ARTICLE_TITLE_SELECTOR = 'h1, h2, h3, h4, a'
+
+RISK_KEYWORDS = {
+    'high': (
+        'recall', 'warning', 'safety', 'death', 'serious', 'urgent',
+        'immediate', 'black box', 'contraindication', 'withdrawal'
+    ),
+    'medium': (
+        'labeling', 'indication', 'dosage', 'administration', 'clinical',
+        'trial', 'study', 'efficacy', 'approval', 'guidance'
+    )
+}
+
+IMPACT_AREAS = {
+    'Clinical Trials': ('clinical', 'trial', 'study', 'protocol'),
+    'Labeling': ('label', 'labeling', 'package insert', 'prescribing'),
+    'Manufacturing': ('manufacturing', 'quality', 'facility', 'inspection'),
+    'Pharmacovigilance': ('safety', 'adverse', 'reaction', 'monitoring'),
+    'Marketing': ('promotion', 'advertising', 'marketing', 'commercial'),
+    'Regulatory Affairs': ('submission', 'filing', 'application', 'review')
+}
+
+# Keyword automata are built once at import; each scan is a single pass over the text
+RISK_MATCHER = KeywordMatcher(RISK_KEYWORDS)
+IMPACT_MATCHER = KeywordMatcher(IMPACT_AREAS)
+
+@dataclass(slots=True)
 class RegulatoryChange:
     source: str
     title: str
@@ -25,12 +74,25 @@ class RegulatoryChange:
 class RegulatoryTracker:
     def __init__(self, db_path="regulatory_tracker.db"):
         self.db_path = db_path
+        # One session reuses TCP/TLS connections across every source request
+        self._session = requests.Session()
+        self._session.headers.update(SCRAPER_HEADERS)
+        
+        # Long-lived connection; WAL lets the dashboard read while a scan is writing
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;"
+        )
         self.init_database()
+    
+    def close(self):
+        """Close the database connection and HTTP session"""
+        self._conn.close()
+        self._session.close()
         
     def init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS regulatory_documents (
@@ -59,8 +121,25 @@ class RegulatoryTracker:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Serves get_recent_changes' date range and its optional source/risk filters
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_changes_lookup
+            ON detected_changes (detected_at DESC, source, risk_level)
+        ''')
+        
+        # AI outputs keyed by the fingerprint of the text they were computed from
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                content_hash TEXT PRIMARY KEY,
+                ai_summary TEXT,
+                impact_areas TEXT,
+                risk_level TEXT,
+                confidence REAL,
+                reasoning TEXT
+            )
+        ''')
+        
+        self._conn.commit()
     
     def scrape_fda_updates(self) -> List[Dict]:
         """Scrape FDA drug updates (free RSS/web scraping)"""
@@ -77,99 +156,116 @@ class RegulatoryTracker:
             }
         ]
         
-        scraped_data = []
-        
+        # Different domains are fetched in parallel; pages on the same domain stay sequential
+        sources_by_domain = {}
         for source in sources:
-            try:
-                print(f"Scraping {source['name']}...")
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = requests.get(source['url'], headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract articles/updates (adjust selectors based on actual HTML)
-                articles = soup.find_all(['article', 'div'], class_=re.compile(r'.*news.*|.*update.*|.*announcement.*'))[:10]
+            sources_by_domain.setdefault(urlparse(source['url']).netloc, []).append(source)
+        
+        scraped_data = []
+        workers = min(MAX_SCRAPE_WORKERS, len(sources_by_domain))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for domain_data in executor.map(self._scrape_domain, sources_by_domain.values()):
+                scraped_data.extend(domain_data)
                 
-                for article in articles:
-                    title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'])
-                    if title_elem:
-                        title = title_elem.get_text().strip()
-                        link_elem = article.find('a')
-                        url = link_elem.get('href') if link_elem else source['url']
-                        
-                        # Make URL absolute
-                        if url.startswith('/'):
-                            url = 'https://www.fda.gov' + url
-                        
-                        content = article.get_text().strip()[:1000]  # First 1000 chars
-                        
-                        scraped_data.append({
-                            'source': source['name'],
-                            'title': title,
-                            'url': url,
-                            'content': content
-                        })
-                        
+        return scraped_data
+    
+    def _scrape_domain(self, sources: List[Dict]) -> List[Dict]:
+        """Scrape sources sharing one domain, pausing between requests"""
+        scraped_data = []
+        
+        for i, source in enumerate(sources):
+            if i > 0:
                 time.sleep(1)  # Be respectful to servers
-                
-            except Exception as e:
-                print(f"Error scraping {source['name']}: {e}")
-                
+            scraped_data.extend(self._scrape_source(source))
+        
         return scraped_data
     
+    def _scrape_source(self, source: Dict) -> List[Dict]:
+        """Fetch one source page and extract its articles/updates"""
+        # Collected column-wise: URL normalization runs once over the column
+        titles, urls, contents = [], [], []
+        
+        try:
+            print(f"Scraping {source['name']}...")
+            response = self._session.get(source['url'], timeout=10)
+            response.raise_for_status()
+            
+            # lxml (libxml2) parses several times faster than the pure-Python html.parser
+            soup = BeautifulSoup(response.content, 'lxml')
+            
+            # Extract articles/updates (adjust selectors based on actual HTML)
+            articles = soup.find_all(['article', 'div'], class_=ARTICLE_CLASS_RE)[:10]
+            
+            for article in articles:
+                title_elem = article.select_one(ARTICLE_TITLE_SELECTOR)
+                if title_elem:
+                    title = title_elem.get_text().strip()
+                    titles.append(title)
+                    link_elem = article.find('a')
+                    urls.append(link_elem.get('href', source['url']) if link_elem else source['url'])
+                    # Read only the teaser/first paragraph instead of the whole container's text
+                    text_elem = article.select_one('.teaser') or article.find('p')
+                    contents.append(text_elem.get_text().strip()[:1000] if text_elem else title)
+            
+        except Exception as e:
+            print(f"Error scraping {source['name']}: {e}")
+        
+        # Make URLs absolute
+        urls = ['https://www.fda.gov' + url if url.startswith('/') else url for url in urls]
+        
+        return [
+            {'source': source['name'], 'title': title, 'url': url, 'content': content}
+            for title, url, content in zip(titles, urls, contents)
+        ]
+    
     def calculate_content_hash(self, content: str) -> str:
-        """Calculate hash of content for change detection"""
-        return hashlib.md5(content.encode()).hexdigest()
+        """Calculate a non-cryptographic fingerprint of content for change detection"""
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(content.encode())
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
     
     def detect_changes(self, scraped_data: List[Dict]) -> List[RegulatoryChange]:
         """Detect changes by comparing with stored data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        stored = self._fetch_stored_documents([item['url'] for item in scraped_data])
         
         detected_changes = []
+        new_documents = []
+        document_updates = []
         
         for item in scraped_data:
             content_hash = self.calculate_content_hash(item['content'])
-            
-            # Check if document exists
-            cursor.execute(
-                "SELECT content_hash, content FROM regulatory_documents WHERE url = ?",
-                (item['url'],)
-            )
-            result = cursor.fetchone()
+            result = stored.get(item['url'])
             
             if result is None:
                 # New document
+                content_lower = item['content'].lower()
                 change = RegulatoryChange(
                     source=item['source'],
                     title=item['title'],
                     url=item['url'],
                     content=item['content'],
                     change_type='new',
-                    risk_level=self.assess_risk_level(item['title'], item['content']),
+                    risk_level=self._assess_risk_level_lower(item['title'].lower(), content_lower),
                     detected_at=datetime.now().isoformat(),
                     summary=self.generate_basic_summary(item['content']),
-                    impact_areas=self.identify_impact_areas(item['content'])
+                    impact_areas=self._identify_impact_areas_lower(content_lower)
                 )
                 detected_changes.append(change)
                 
-                # Store new document
-                cursor.execute('''
-                    INSERT INTO regulatory_documents 
-                    (source, title, url, content_hash, content, last_updated, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                new_documents.append((
                     item['source'], item['title'], item['url'], content_hash, 
                     item['content'], datetime.now().isoformat(), datetime.now().isoformat()
                 ))
                 
+            elif result[0] != content_hash and result[1] == item['content']:
+                # Same text fingerprinted by a different hash function; just refresh it
+                document_updates.append((content_hash, item['content'], None, item['url']))
+                
             elif result[0] != content_hash:
                 # Document updated
                 old_content = result[1]
                 diff = self.generate_diff(old_content, item['content'])
+                diff_lower = diff.lower()
                 
                 change = RegulatoryChange(
                     source=item['source'],
@@ -177,104 +273,172 @@ class RegulatoryTracker:
                     url=item['url'],
                     content=diff,
                     change_type='updated',
-                    risk_level=self.assess_risk_level(item['title'], diff),
+                    risk_level=self._assess_risk_level_lower(item['title'].lower(), diff_lower),
                     detected_at=datetime.now().isoformat(),
                     summary=self.generate_basic_summary(diff),
-                    impact_areas=self.identify_impact_areas(diff)
+                    impact_areas=self._identify_impact_areas_lower(diff_lower)
                 )
                 detected_changes.append(change)
                 
-                # Update document
-                cursor.execute('''
-                    UPDATE regulatory_documents 
-                    SET content_hash = ?, content = ?, last_updated = ?
-                    WHERE url = ?
-                ''', (content_hash, item['content'], datetime.now().isoformat(), item['url']))
+                document_updates.append(
+                    (content_hash, item['content'], datetime.now().isoformat(), item['url'])
+                )
+            
+            # Later items with the same URL compare against this version
+            stored[item['url']] = (content_hash, item['content'])
+        
+        cursor = self._conn.cursor()
+        
+        # Store new documents, then apply updates in scrape order
+        cursor.executemany('''
+            INSERT INTO regulatory_documents 
+            (source, title, url, content_hash, content, last_updated, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', new_documents)
+        
+        cursor.executemany('''
+            UPDATE regulatory_documents 
+            SET content_hash = ?, content = ?, last_updated = COALESCE(?, last_updated)
+            WHERE url = ?
+        ''', document_updates)
         
         # Store detected changes
-        for change in detected_changes:
-            cursor.execute('''
-                INSERT INTO detected_changes 
-                (source, title, url, change_type, risk_level, summary, impact_areas, detected_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        cursor.executemany('''
+            INSERT INTO detected_changes 
+            (source, title, url, change_type, risk_level, summary, impact_areas, detected_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
                 change.source, change.title, change.url, change.change_type,
                 change.risk_level, change.summary, json.dumps(change.impact_areas), 
                 change.detected_at
-            ))
+            )
+            for change in detected_changes
+        ])
         
-        conn.commit()
-        conn.close()
+        self._conn.commit()
         
         return detected_changes
     
+    def _fetch_stored_documents(self, urls: List[str]) -> Dict[str, tuple]:
+        """Map url -> (content_hash, content) for already-stored documents, in batched queries"""
+        unique_urls = list(dict.fromkeys(urls))
+        stored = {}
+        
+        for start in range(0, len(unique_urls), SQLITE_MAX_PARAMS):
+            batch = unique_urls[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"SELECT url, content_hash, content FROM regulatory_documents WHERE url IN ({placeholders})",
+                batch
+            )
+            stored.update((url, (content_hash, content)) for url, content_hash, content in rows)
+        
+        return stored
+    
+    def get_cached_ai_results(self, content_hashes: List[str]) -> Dict[str, Dict]:
+        """Map content_hash -> stored AI analysis for hashes already in the cache"""
+        unique_hashes = list(dict.fromkeys(content_hashes))
+        cached = {}
+        
+        for start in range(0, len(unique_hashes), SQLITE_MAX_PARAMS):
+            batch = unique_hashes[start:start + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"""SELECT content_hash, ai_summary, impact_areas, risk_level, confidence, reasoning
+                    FROM ai_cache WHERE content_hash IN ({placeholders})""",
+                batch
+            )
+            for content_hash, ai_summary, impact_areas, risk_level, confidence, reasoning in rows:
+                cached[content_hash] = {
+                    'ai_summary': ai_summary,
+                    'impact_areas': json.loads(impact_areas),
+                    'risk_level': risk_level,
+                    'confidence': confidence,
+                    'reasoning': reasoning
+                }
+        
+        return cached
+    
+    def store_ai_results(self, results: Dict[str, Dict]):
+        """Write AI analyses to the cache, keyed by content_hash"""
+        self._conn.executemany('''
+            INSERT OR REPLACE INTO ai_cache 
+            (content_hash, ai_summary, impact_areas, risk_level, confidence, reasoning)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                content_hash, result['ai_summary'], json.dumps(result['impact_areas']),
+                result['risk_level'], result['confidence'], result['reasoning']
+            )
+            for content_hash, result in results.items()
+        ])
+        self._conn.commit()
+    
     def generate_diff(self, old_content: str, new_content: str) -> str:
-        """Generate human-readable diff"""
+        """Generate human-readable diff of removed (-) and added (+) lines"""
         old_lines = old_content.splitlines()
         new_lines = new_content.splitlines()
         
-        diff = list(difflib.unified_diff(old_lines, new_lines, lineterm='', n=3))
-        return '\n'.join(diff)
+        # Set membership is O(N+M); difflib's sequence matching is O(N*M) on long pages
+        old_set = set(old_lines)
+        new_set = set(new_lines)
+        
+        removed = ['-' + line for line in old_lines if line not in new_set]
+        added = ['+' + line for line in new_lines if line not in old_set]
+        return '\n'.join(removed + added)
     
     def assess_risk_level(self, title: str, content: str) -> str:
         """Assess risk level based on keywords"""
-        high_risk_keywords = [
-            'recall', 'warning', 'safety', 'death', 'serious', 'urgent',
-            'immediate', 'black box', 'contraindication', 'withdrawal'
-        ]
-        
-        medium_risk_keywords = [
-            'labeling', 'indication', 'dosage', 'administration', 'clinical',
-            'trial', 'study', 'efficacy', 'approval', 'guidance'
-        ]
-        
-        text = (title + ' ' + content).lower()
+        return self._assess_risk_level_lower(title.lower(), content.lower())
+    
+    def _assess_risk_level_lower(self, title_lower: str, content_lower: str) -> str:
+        """Keyword risk assessment on already-lowercased title and content"""
+        scores = RISK_MATCHER.count(f"{title_lower} {content_lower}")
         
-        if any(keyword in text for keyword in high_risk_keywords):
+        if scores['high'] > 0:
             return 'high'
-        elif any(keyword in text for keyword in medium_risk_keywords):
+        elif scores['medium'] > 0:
             return 'medium'
         else:
             return 'low'
     
     def identify_impact_areas(self, content: str) -> List[str]:
         """Identify which areas are impacted"""
-        areas = {
-            'Clinical Trials': ['clinical', 'trial', 'study', 'protocol'],
-            'Labeling': ['label', 'labeling', 'package insert', 'prescribing'],
-            'Manufacturing': ['manufacturing', 'quality', 'facility', 'inspection'],
-            'Pharmacovigilance': ['safety', 'adverse', 'reaction', 'monitoring'],
-            'Marketing': ['promotion', 'advertising', 'marketing', 'commercial'],
-            'Regulatory Affairs': ['submission', 'filing', 'application', 'review']
-        }
-        
-        content_lower = content.lower()
-        impacted_areas = []
-        
-        for area, keywords in areas.items():
-            if any(keyword in content_lower for keyword in keywords):
-                impacted_areas.append(area)
+        return self._identify_impact_areas_lower(content.lower())
+    
+    def _identify_impact_areas_lower(self, content_lower: str) -> List[str]:
+        """Impact area detection on already-lowercased content"""
+        scores = IMPACT_MATCHER.count(content_lower)
+        impacted_areas = [area for area, score in scores.items() if score > 0]
         
         return impacted_areas if impacted_areas else ['General']
     
     def generate_basic_summary(self, content: str) -> str:
         """Generate basic summary without AI (for free version)"""
-        sentences = content.split('.')[:3]  # First 3 sentences
+        sentences = content.split('.', 3)[:3]  # First 3 sentences, without splitting the rest
         summary = '. '.join(s.strip() for s in sentences if s.strip())
         return summary[:200] + "..." if len(summary) > 200 else summary
     
-    def get_recent_changes(self, days: int = 7) -> List[Dict]:
-        """Get recent changes from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_recent_changes(self, days: int = 7, sources: Optional[List[str]] = None,
+                           risk_levels: Optional[List[str]] = None) -> List[Dict]:
+        """Get recent changes from database, optionally limited to some sources/risk levels"""
+        cursor = self._conn.cursor()
         
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
         
-        cursor.execute('''
+        conditions = ['detected_at > ?']
+        params = [cutoff_date]
+        for column, values in (('source', sources), ('risk_level', risk_levels)):
+            if values is not None:
+                conditions.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        
+        cursor.execute(f'''
             SELECT * FROM detected_changes 
-            WHERE detected_at > ? 
+            WHERE {' AND '.join(conditions)} 
             ORDER BY detected_at DESC
-        ''', (cutoff_date,))
+        ''', params)
         
         columns = ['id', 'source', 'title', 'url', 'change_type', 'risk_level', 
                   'summary', 'impact_areas', 'detected_at']
@@ -285,7 +449,6 @@ class RegulatoryTracker:
             change_dict['impact_areas'] = json.loads(change_dict['impact_areas'])
             changes.append(change_dict)
         
-        conn.close()
         return changes
 
 # Example usage and demo
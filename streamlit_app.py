@@ -1,17 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
-import plotly.express as px
+import plotly.graph_objects as go
 
-# Page config
-st.set_page_config(
-    page_title="AI Regulatory Change Tracker",
-    page_icon="🏥",
-    layout="wide"
-)
-
-# Custom CSS - simplified
-st.markdown("""
+# Static page chrome; literals come straight from the cached compiled script on each rerun
+APP_CSS = """
 <style>
 .main-header {
     background: linear-gradient(90deg, #1e40af 0%, #3b82f6 100%);
@@ -32,13 +26,115 @@ st.markdown("""
 .severity-high { border-left-color: #dc2626 !important; }
 .severity-medium { border-left-color: #f59e0b !important; }
 .severity-low { border-left-color: #10b981 !important; }
+.change-expander {
+    border: 1px solid #e5e7eb;
+    border-radius: 8px;
+    padding: 0.5rem 1rem;
+    margin-bottom: 0.5rem;
+}
+.change-expander summary { cursor: pointer; font-weight: 600; }
+.change-columns { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+.metric-row { display: flex; gap: 1rem; margin-bottom: 1rem; }
+.metric-row > div { flex: 1; }
+.metric-label { font-size: 0.875rem; color: #6b7280; }
+.metric-value { font-size: 2.25rem; line-height: 1.2; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1>🏥 AI Regulatory Change Tracker</h1>
+    <p>Pharma-focused regulatory intelligence with workflow automation</p>
+</div>
+"""
+
+# Regions beyond this many slices are folded into "Other" in the pie chart
+MAX_PIE_SLICES = 8
+
+# Above this many rows the changes are shown as one table instead of cards
+CARD_VIEW_MAX_ROWS = 20
+
+# Compact view the user picks rows from when changes are shown as cards
+ACTION_TABLE_COLUMNS = ['Title', 'Product', 'Region', 'Severity', 'Status', 'Date']
+
+# One expander-style card per change; rendered together in a single markdown call
+CHANGE_CARD_COLUMNS = [
+    'Title', 'Product', 'Region', 'Authority', 'Manufacturer', 'Therapeutic_Area',
+    'Severity', 'Status', 'Date', 'Description', 'Impact', 'Document_Changes'
+]
+METRIC_TEMPLATE = '<div><div class="metric-label">{label}</div><div class="metric-value">{value}</div></div>'
+CHANGE_CARD_TEMPLATE = """<details class="change-expander">
+<summary>🔍 {Title} - {Product}</summary>
+<div class="change-columns">
+<div class="change-card {severity_class}">
+<h4>📍 {Region} - {Authority}</h4>
+<p><strong>Product:</strong> {Product}</p>
+<p><strong>Manufacturer:</strong> {Manufacturer}</p>
+<p><strong>Therapeutic Area:</strong> {Therapeutic_Area}</p>
+<p><strong>Severity:</strong> {Severity}</p>
+<p><strong>Status:</strong> {Status}</p>
+<p><strong>Date:</strong> {Date:%Y-%m-%d}</p>
+</div>
+<div class="change-card">
+<h4>📝 Description</h4>
+<p>{Description}</p>
+<h4>💼 Business Impact</h4>
+<p>{Impact}</p>
+<h4>📄 Document Changes Required</h4>
+<p style="background: #fef2f2; padding: 10px; border-radius: 5px;">{Document_Changes}</p>
+</div>
+</div>
+</details>"""
+
+# Divider, timestamp and sources in one element; blank lines keep "---" a rule, not a heading underline
+FOOTER_TEMPLATE = "---\n\n🔄 Last updated: {stamp}\n\n🌐 Data sources: FDA, EMA, CDSCO"
+
+# Dashboard sections, shown one at a time
+SECTIONS = ("📊 Regulatory Changes", "⚡ Workflow Automation")
+
+# Workflow setting options
+ALERT_FREQUENCIES = ("Immediate", "Daily", "Weekly")
+TEAM_GROUPS = ("Regulatory", "Quality", "Legal", "Product")
+SEVERITY_THRESHOLDS = ("All", "Medium & High", "High Only")
+
+# Widget keys of the workflow settings, kept across section switches
+WORKFLOW_SETTING_KEYS = ("alert_email", "alert_frequency", "team_members", "severity_threshold")
+
+# Workflow Automation tab copy
+# (title, description, status) per integration card, laid out one per column
+INTEGRATIONS = (
+    ("📧 Email Notifications", "Automated alerts via SMTP integration", "🟢 **Status:** Active"),
+    ("💬 Slack Integration", "Real-time notifications to team channels", "🟢 **Status:** Ready to Connect"),
+    ("🔗 Webhook API", "Connect to existing workflow systems", "🔵 **Status:** Available")
+)
+INTEGRATION_CARDS_MD = tuple(
+    f"### {title}\n{description}\n\n{status}" for title, description, status in INTEGRATIONS
+)
+
+AUTOMATED_ACTIONS = (
+    "Auto-generate document change summaries",
+    "Schedule team notifications based on severity",
+    "Create calendar reminders for compliance deadlines",
+    "Export filtered reports to CSV/PDF",
+    "Trigger workflow integrations via webhooks",
+    "Generate regulatory impact assessments"
+)
+AUTOMATED_ACTIONS_MD = "### 🤖 Automated Actions Available\n" + "\n".join(f"- ✅ {action}" for action in AUTOMATED_ACTIONS)
+
+# Page config
+st.set_page_config(
+    page_title="AI Regulatory Change Tracker",
+    page_icon="🏥",
+    layout="wide"
+)
+
+# Custom CSS - simplified
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # Data
 @st.cache_data
 def load_data():
-    return pd.DataFrame([
+    df = pd.DataFrame([
         {
             'Region': 'US',
             'Authority': 'FDA',
@@ -99,66 +195,95 @@ def load_data():
             'Document_Changes': 'Clinical Study Report template updated - new Section 16 for RWE data',
             'Status': 'Active'
         }
-    ])
+    ]).convert_dtypes(dtype_backend='pyarrow')  # Arrow-backed columns serialize to the frontend without conversion
+    
+    # Low-cardinality columns compare and count on integer codes as categoricals
+    for col in ('Region', 'Authority', 'Therapeutic_Area', 'Severity', 'Status', 'Change_Type'):
+        df[col] = df[col].astype('category')
+    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', cache=True)
+    
+    # Lowercased Product/Manufacturer text for the search box; \x1f keeps matches from spanning both
+    df['_search'] = df['Product'].str.cat(df['Manufacturer'], sep='\x1f', na_rep='').str.lower()
+    
+    return df
+
+@st.cache_data
+def filter_changes(region, therapeutic_area, search_term):
+    """Rows of the loaded data matching the sidebar filters"""
+    df = load_data()
+    
+    # Combine every condition into one mask, then select rows once
+    mask = np.ones(len(df), dtype=bool)
+    
+    if region != 'All Regions':
+        mask &= (df['Region'].values == region)
+    
+    if therapeutic_area != 'All Areas':
+        mask &= (df['Therapeutic_Area'].values == therapeutic_area)
+    
+    if search_term:
+        mask &= df['_search'].str.contains(search_term.lower(), regex=False, na=False).to_numpy(dtype=bool)
+    
+    # With no active filter, skip the row selection entirely
+    return df if mask.all() else df.loc[mask]
+
+@st.cache_data(ttl=60)
+def _now_stamp():
+    """Footer timestamp, refreshed at most once a minute across reruns"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 # Load data
 df = load_data()
 
+# Streamlit drops the state of widgets that aren't drawn; re-assigning keeps
+# the workflow settings while the other section is showing
+for key in WORKFLOW_SETTING_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+
 # Header
-st.markdown("""
-<div class="main-header">
-    <h1>🏥 AI Regulatory Change Tracker</h1>
-    <p>Pharma-focused regulatory intelligence with workflow automation</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 # Sidebar
 st.sidebar.header("🔍 Filters")
 
-# Filters
-regions = ['All Regions'] + sorted(df['Region'].unique().tolist())
+# Filters: categories of the cached frame are its sorted distinct values
+regions = ['All Regions'] + df['Region'].cat.categories.tolist()
 selected_region = st.sidebar.selectbox("Select Region", regions)
 
-therapeutic_areas = ['All Areas'] + sorted(df['Therapeutic_Area'].unique().tolist())
+therapeutic_areas = ['All Areas'] + df['Therapeutic_Area'].cat.categories.tolist()
 selected_therapeutic = st.sidebar.selectbox("Select Therapeutic Area", therapeutic_areas)
 
 search_term = st.sidebar.text_input("🔍 Search Products/Companies")
 
-# Apply filters
-filtered_df = df.copy()
+# Filtering reruns only when a sidebar value actually changes
+filtered_df = filter_changes(selected_region, selected_therapeutic, search_term)
 
-if selected_region != 'All Regions':
-    filtered_df = filtered_df[filtered_df['Region'] == selected_region]
-
-if selected_therapeutic != 'All Areas':
-    filtered_df = filtered_df[filtered_df['Therapeutic_Area'] == selected_therapeutic]
-
-if search_term:
-    mask = (filtered_df['Product'].str.contains(search_term, case=False, na=False) |
-            filtered_df['Manufacturer'].str.contains(search_term, case=False, na=False))
-    filtered_df = filtered_df[mask]
-
-# Main content
-tab1, tab2 = st.tabs(["📊 Regulatory Changes", "⚡ Workflow Automation"])
-
-with tab1:
-    # Metrics
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Total Changes", len(filtered_df))
-    
-    with col2:
-        high_count = len(filtered_df[filtered_df['Severity'] == 'High'])
-        st.metric("High Impact", high_count)
+# Main content: each section is a fragment, so its own widgets rerun only that section
+@st.fragment
+def render_changes(filtered_df):
+    """Metrics, charts, change list and actions for the filtered changes"""
+    # Metrics: one count per column instead of a mask and slice per metric
+    sev_counts = filtered_df['Severity'].value_counts()
+    status_counts = filtered_df['Status'].value_counts()
     
-    with col3:
-        active_count = len(filtered_df[filtered_df['Status'] == 'Active'])
-        st.metric("Active Changes", active_count)
+    high_count = int(sev_counts.get('High', 0))
+    active_count = int(status_counts.get('Active', 0))
+    impl_count = int(status_counts.get('Implementation Required', 0))
     
-    with col4:
-        impl_count = len(filtered_df[filtered_df['Status'] == 'Implementation Required'])
-        st.metric("Action Required", impl_count)
+    # All four metrics go to the frontend as one element
+    metrics = (
+        ("Total Changes", len(filtered_df)),
+        ("High Impact", high_count),
+        ("Active Changes", active_count),
+        ("Action Required", impl_count)
+    )
+    st.markdown(
+        '<div class="metric-row">'
+        + "".join(METRIC_TEMPLATE.format(label=label, value=value) for label, value in metrics)
+        + '</div>',
+        unsafe_allow_html=True
+    )
     
     # Charts
     if len(filtered_df) > 0:
@@ -166,121 +291,119 @@ with tab1:
         
         with col1:
             region_counts = filtered_df['Region'].value_counts()
-            fig1 = px.pie(values=region_counts.values, names=region_counts.index, 
-                         title="Changes by Region")
+            region_counts = region_counts[region_counts > 0]  # Categoricals also count unused categories
+            if len(region_counts) > MAX_PIE_SLICES:
+                top_regions = region_counts.iloc[:MAX_PIE_SLICES - 1]
+                other = pd.Series({'Other': region_counts.iloc[MAX_PIE_SLICES - 1:].sum()})
+                region_counts = pd.concat([top_regions, other])
+            # graph_objects skips plotly.express's DataFrame introspection
+            fig1 = go.Figure(
+                go.Pie(labels=region_counts.index, values=region_counts.values),
+                layout_title_text="Changes by Region"
+            )
             st.plotly_chart(fig1, use_container_width=True)
         
         with col2:
-            severity_counts = filtered_df['Severity'].value_counts()
-            fig2 = px.bar(x=severity_counts.index, y=severity_counts.values,
-                         title="Changes by Severity")
+            # Reuse the metrics' counts; categoricals also count unused categories
+            severity_counts = sev_counts[sev_counts > 0]
+            fig2 = go.Figure(
+                go.Bar(x=severity_counts.index, y=severity_counts.values),
+                layout_title_text="Changes by Severity"
+            )
             st.plotly_chart(fig2, use_container_width=True)
     
     # Display changes
     st.subheader(f"📋 Regulatory Changes ({len(filtered_df)} found)")
     
-    for idx, row in filtered_df.iterrows():
-        severity_class = f"severity-{row['Severity'].lower()}"
-        
-        with st.expander(f"🔍 {row['Title']} - {row['Product']}", expanded=False):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown(f"""
-                <div class="change-card {severity_class}">
-                    <h4>📍 {row['Region']} - {row['Authority']}</h4>
-                    <p><strong>Product:</strong> {row['Product']}</p>
-                    <p><strong>Manufacturer:</strong> {row['Manufacturer']}</p>
-                    <p><strong>Therapeutic Area:</strong> {row['Therapeutic_Area']}</p>
-                    <p><strong>Severity:</strong> {row['Severity']}</p>
-                    <p><strong>Status:</strong> {row['Status']}</p>
-                    <p><strong>Date:</strong> {row['Date']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown(f"""
-                <div class="change-card">
-                    <h4>📝 Description</h4>
-                    <p>{row['Description']}</p>
-                    
-                    <h4>💼 Business Impact</h4>
-                    <p>{row['Impact']}</p>
-                    
-                    <h4>📄 Document Changes Required</h4>
-                    <p style="background: #fef2f2; padding: 10px; border-radius: 5px;">
-                        {row['Document_Changes']}
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Action buttons
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button(f"📧 Send Alert", key=f"alert_{idx}"):
-                    st.success("✅ Alert sent!")
-            with col2:
-                if st.button(f"📅 Schedule Review", key=f"schedule_{idx}"):
-                    st.success("✅ Review scheduled!")
-            with col3:
-                if st.button(f"📊 Generate Report", key=f"report_{idx}"):
-                    st.success("✅ Report generated!")
-
-with tab2:
-    st.header("⚡ Workflow Automation")
-    st.subheader("Free Integration Options Available Now")
-    
-    col1, col2, col3 = st.columns(3)
+    table_config = {
+        'Therapeutic_Area': st.column_config.TextColumn("Therapeutic Area"),
+        'Date': st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+        'Document_Changes': st.column_config.TextColumn("Document Changes")
+    }
     
-    with col1:
-        st.markdown("""
-        ### 📧 Email Notifications
-        Automated alerts via SMTP integration
+    if len(filtered_df) > CARD_VIEW_MAX_ROWS:
+        # Large result sets go to the frontend as a single Arrow table; rows are selectable in place
+        selection = st.dataframe(
+            filtered_df[CHANGE_CARD_COLUMNS],
+            width="stretch",
+            hide_index=True,
+            column_config=table_config,
+            on_select="rerun",
+            selection_mode="multi-row"
+        )
+    else:
+        # Build every card in one pass and send them to the frontend as a single element
+        card_df = filtered_df[CHANGE_CARD_COLUMNS].assign(
+            # Renames the few categories, not each row
+            severity_class=filtered_df['Severity'].cat.rename_categories(lambda c: f"severity-{c.lower()}")
+        )
+        change_cards = [CHANGE_CARD_TEMPLATE.format_map(record) for record in card_df.to_dict('records')]
+        st.markdown("".join(change_cards), unsafe_allow_html=True)
         
-        🟢 **Status:** Active
-        """)
+        if len(filtered_df) > 0:
+            st.caption("🎯 Select changes to act on")
+            selection = st.dataframe(
+                filtered_df[ACTION_TABLE_COLUMNS],
+                width="stretch",
+                hide_index=True,
+                column_config=table_config,
+                on_select="rerun",
+                selection_mode="multi-row"
+            )
     
-    with col2:
-        st.markdown("""
-        ### 💬 Slack Integration  
-        Real-time notifications to team channels
+    # One set of action buttons works on the selected rows, regardless of row count
+    if len(filtered_df) > 0:
+        selected_titles = filtered_df['Title'].iloc[selection.selection.rows].tolist()
         
-        🟢 **Status:** Ready to Connect
-        """)
-    
-    with col3:
-        st.markdown("""
-        ### 🔗 Webhook API
-        Connect to existing workflow systems
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            send_alert = st.button("📧 Send Alert", key="alert")
+        with col2:
+            schedule_review = st.button("📅 Schedule Review", key="schedule")
+        with col3:
+            generate_report = st.button("📊 Generate Report", key="report")
         
-        🔵 **Status:** Available
-        """)
+        if (send_alert or schedule_review or generate_report) and not selected_titles:
+            st.warning("Select one or more changes first")
+        elif send_alert:
+            st.success(f"✅ Alert sent for {len(selected_titles)} change(s): {', '.join(selected_titles)}")
+        elif schedule_review:
+            st.success(f"✅ Review scheduled for {len(selected_titles)} change(s): {', '.join(selected_titles)}")
+        elif generate_report:
+            st.success(f"✅ Report generated for {len(selected_titles)} change(s): {', '.join(selected_titles)}")
+
+@st.fragment
+def render_workflow_automation():
+    """Integration overview and alert configuration"""
+    st.header("⚡ Workflow Automation")
+    st.subheader("Free Integration Options Available Now")
+    
+    for col, card_md in zip(st.columns(len(INTEGRATION_CARDS_MD)), INTEGRATION_CARDS_MD):
+        col.markdown(card_md)
     
     st.markdown("---")
     
-    st.markdown("""
-    ### 🤖 Automated Actions Available
-    - ✅ Auto-generate document change summaries
-    - ✅ Schedule team notifications based on severity
-    - ✅ Create calendar reminders for compliance deadlines  
-    - ✅ Export filtered reports to CSV/PDF
-    - ✅ Trigger workflow integrations via webhooks
-    - ✅ Generate regulatory impact assessments
-    """)
+    st.markdown(AUTOMATED_ACTIONS_MD)
     
     # Configuration
     st.subheader("⚙️ Quick Configuration")
     col1, col2 = st.columns(2)
     
     with col1:
-        st.text_input("📧 Email for Alerts", placeholder="regulatory@company.com")
-        st.selectbox("🔔 Alert Frequency", ["Immediate", "Daily", "Weekly"])
+        st.text_input("📧 Email for Alerts", placeholder="regulatory@company.com", key="alert_email")
+        st.selectbox("🔔 Alert Frequency", ALERT_FREQUENCIES, key="alert_frequency")
     
     with col2:
-        st.multiselect("👥 Team Members", ["Regulatory", "Quality", "Legal", "Product"])
-        st.selectbox("⚠️ Severity Threshold", ["All", "Medium & High", "High Only"])
+        st.multiselect("👥 Team Members", TEAM_GROUPS, key="team_members")
+        st.selectbox("⚠️ Severity Threshold", SEVERITY_THRESHOLDS, key="severity_threshold")
+
+# Only the chosen section runs; st.tabs would build every section on each rerun
+section = st.radio("Section", SECTIONS, horizontal=True, key="active_section", label_visibility="collapsed")
+
+if section == SECTIONS[0]:
+    render_changes(filtered_df)
+else:
+    render_workflow_automation()
 
 # Footer
-st.markdown("---")
-st.markdown(f"🔄 Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-st.markdown("🌐 Data sources: FDA, EMA, CDSCO")
+st.markdown(FOOTER_TEMPLATE.format(stamp=_now_stamp()))